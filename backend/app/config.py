@@ -1,8 +1,9 @@
 """Application configuration with environment detection."""
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -22,12 +23,11 @@ class Settings(BaseSettings):
     db_path: Path = user_data_dir / "vibereader.db"
     
     # Database URLs
-    @property
+    @cached_property
     def database_url(self) -> str:
-        """Get database URL based on environment."""
+        """Get database URL based on environment (computed once)."""
         if self.is_desktop:
-            # Desktop: SQLite
-            self.user_data_dir.mkdir(parents=True, exist_ok=True)
+            # Desktop: SQLite (directory created by init_desktop_directories)
             return f"sqlite+aiosqlite:///{self.db_path}"
         else:
             # Web: PostgreSQL (from environment)
@@ -36,6 +36,16 @@ class Settings(BaseSettings):
                 raise ValueError("DATABASE_URL must be set for web mode")
             return db_url
     
+    # Web: DATABASE_URL points at PgBouncer (transaction pooling) instead of
+    # PostgreSQL directly
+    use_pgbouncer: bool = False
+    
+    # Resampling filter for cover thumbnails. Covers are re-encoded as small
+    # JPEGs, so bilinear looks the same as lanczos at a fraction of the cost.
+    cover_resample_filter: Literal[
+        "nearest", "box", "bilinear", "hamming", "bicubic", "lanczos"
+    ] = "bilinear"
+    
     # CORS settings
     cors_origins: list[str] = [
         "http://localhost:5173",  # Vite dev server
@@ -50,12 +60,15 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings instance (parses .env only once)."""
+    return Settings()
 
 
 def init_desktop_directories():
     """Initialize desktop storage directories."""
+    settings = get_settings()
     if settings.is_desktop:
         settings.user_data_dir.mkdir(parents=True, exist_ok=True)
         settings.books_dir.mkdir(parents=True, exist_ok=True)
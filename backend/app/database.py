@@ -1,18 +1,105 @@
 """Database connection and session management."""
+import hashlib
+import logging
+from uuid import uuid4
+from sqlalchemy import event, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import StaticPool
-from .config import settings
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from .config import get_settings
 from .models.base import Base
 
+settings = get_settings()
+logger = logging.getLogger("vibereader.database")
+
+
+# SQLite PRAGMAs applied once to every new desktop connection
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",  # 64MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",  # Enforce ON DELETE CASCADE for annotations
+    "PRAGMA busy_timeout=5000",  # Wait for a competing writer instead of failing
+)
+
+if settings.is_desktop:
+    # Desktop: keep a small pool of long-lived SQLite connections so each one
+    # holds on to its page cache instead of serialising on a single connection
+    engine_options = {
+        "connect_args": {"check_same_thread": False},
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": 8,
+    }
+elif settings.use_pgbouncer:
+    # Web behind PgBouncer: it already pools server connections across
+    # workers, so don't hold a second pool per process. Transaction pooling
+    # can't keep prepared statements, so asyncpg's statement caches are off.
+    # Statements are still prepared per query; asyncpg's default names come
+    # from a per-connection counter and would collide on a shared server
+    # connection, so each gets a unique name.
+    engine_options = {
+        "poolclass": NullPool,
+        "connect_args": {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        },
+    }
+else:
+    # Web: size the PostgreSQL pool for concurrent requests and drop stale
+    # connections (e.g. after a database restart) before handing them out
+    engine_options = {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+        "pool_timeout": 30,
+    }
 
 # Create async engine
 engine = create_async_engine(
     settings.database_url,
     echo=False,  # Set to True for SQL query logging
-    connect_args={"check_same_thread": False} if settings.is_desktop else {},
-    poolclass=StaticPool if settings.is_desktop else None,
+    insertmanyvalues_page_size=1000,  # Rows per batched INSERT ... RETURNING
+    **engine_options,
+)
+
+if settings.is_desktop:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new SQLite connection."""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+# Indexes superseded by newer ones, dropped from existing databases
+OBSOLETE_INDEXES = (
+    "ix_highlights_cfi_range",
+    "ix_notes_cfi_range",
+    "ix_chat_contexts_cfi_range",
+    # book_id lookups are served by the composite (book_id, ...) indexes
+    "ix_highlights_book_id",
+    "ix_notes_book_id",
+    "ix_chat_contexts_book_id",
 )
 
+
+def _schema_hash() -> str:
+    """Fingerprint of the mapped schema, used to skip redundant create_all runs."""
+    tables = sorted(
+        (
+            table.name,
+            tuple(column.name for column in table.columns),
+            tuple(sorted(index.name for index in table.indexes)),
+        )
+        for table in Base.metadata.tables.values()
+    )
+    return hashlib.sha256(repr((tables, OBSOLETE_INDEXES)).encode()).hexdigest()
+
+
 # Create session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -20,12 +107,81 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Session factory for read-only endpoints (nothing pending, so never autoflush)
+ReadOnlySessionLocal = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
+def _add_missing_columns(sync_conn):
+    """Add mapped columns that existing tables don't have yet.
+    
+    Replaces one-off ALTER TABLE migration scripts. New columns must be
+    nullable or have a constant server default (a SQLite ADD COLUMN limit).
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=sync_conn.dialect)
+                sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def _create_schema(sync_conn):
+    """Create missing tables, columns and indexes."""
+    Base.metadata.create_all(sync_conn)
+    _add_missing_columns(sync_conn)
+    # create_all only builds indexes together with a new table
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+    for name in OBSOLETE_INDEXES:
+        sync_conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _sync_desktop_schema(sync_conn, schema_hash: str) -> bool:
+    """Bring the SQLite schema up to date; returns False if it already was.
+    
+    The hash of the last applied schema is stored in the database, so
+    launches with an unchanged schema skip the per-table existence checks.
+    """
+    sync_conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS _schema_meta (hash VARCHAR(64) NOT NULL)"
+    ))
+    stored = sync_conn.execute(text("SELECT hash FROM _schema_meta LIMIT 1")).scalar()
+    if stored == schema_hash:
+        return False
+    
+    _create_schema(sync_conn)
+    sync_conn.execute(text("DELETE FROM _schema_meta"))
+    sync_conn.execute(
+        text("INSERT INTO _schema_meta (hash) VALUES (:hash)"),
+        {"hash": schema_hash},
+    )
+    return True
+
 
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("✓ Database initialized")
+        if settings.is_desktop:
+            # One synchronous pass in a single transaction
+            changed = await conn.run_sync(_sync_desktop_schema, _schema_hash())
+            if not changed:
+                logger.info("✓ Database schema up to date")
+                return
+        else:
+            await conn.run_sync(_create_schema)
+    logger.info("✓ Database initialized")
+
+
+async def close_db():
+    """Close all pooled database connections."""
+    await engine.dispose()
 
 
 async def get_db() -> AsyncSession:
@@ -35,3 +191,9 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncSession:
+    """Dependency for getting sessions in read-only (GET) endpoints."""
+    async with ReadOnlySessionLocal() as session:
+        yield session
@@ -2,33 +2,35 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
-from .config import settings, init_desktop_directories
-from .database import init_db
+from .config import get_settings, init_desktop_directories
+from .database import init_db, close_db
 from .routers import books, annotations, settings as settings_router
-from .middleware.logging import RequestLoggingMiddleware, log_startup_info
+from .middleware.compression import SelectiveGZipMiddleware
+from .middleware.logging import RequestLoggingMiddleware, configure_logging, log_startup_info
 
+configure_logging()
+settings = get_settings()
 logger = logging.getLogger("vibereader")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    # Startup
+    # Startup (directories first: nothing else creates them)
+    init_desktop_directories()
     log_startup_info()
     
-    if settings.is_desktop:
-        init_desktop_directories()
-    
     await init_db()
-    logger.info("✓ Database initialized")
     logger.info("✓ API Ready!")
     
     yield
     
     # Shutdown
     logger.info("👋 Shutting down...")
+    await close_db()
 
 
 # Create FastAPI app
@@ -37,18 +39,24 @@ app = FastAPI(
     description="EPUB reader with annotations and AI features",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add logging middleware
 app.add_middleware(RequestLoggingMiddleware)
 
+# Compress larger JSON responses (book and annotation lists); EPUB downloads
+# are left alone
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["authorization", "content-type", "x-requested-with"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
 # Include routers
@@ -0,0 +1,21 @@
+"""Response compression middleware."""
+import re
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# EPUB downloads are ZIP archives already; gzipping them only costs CPU
+UNCOMPRESSED_PATHS = re.compile(r"^/api/books/\d+/file$")
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that passes already-compressed downloads through untouched."""
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and UNCOMPRESSED_PATHS.match(scope["path"]):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
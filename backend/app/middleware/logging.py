@@ -1,62 +1,101 @@
 """Enhanced logging middleware for debugging."""
+import atexit
+import queue
 import time
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    datefmt='%H:%M:%S'
-)
+import logging.handlers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger("vibereader")
 
+# Probe/landing endpoints that are polled frequently and not worth logging
+SKIP_PATHS = frozenset({"/health", "/"})
+
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Log all HTTP requests with timing and details."""
+def configure_logging(level: int = logging.INFO):
+    """Attach the console handler to the app logger (safe to call repeatedly).
+    
+    Records are handed to a queue and written by a background listener
+    thread, so request handlers never block on console I/O.
+    """
+    if logger.handlers:
+        return
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        datefmt='%H:%M:%S'
+    ))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    # Don't let the root logger emit every record a second time
+    logger.propagate = False
+
+
+class RequestLoggingMiddleware:
+    """Log all HTTP requests with timing and details.
+    
+    Implemented as a plain ASGI middleware: it only observes the response
+    status, so it avoids the extra task and stream hop BaseHTTPMiddleware adds.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
         # Start timing
-        start_time = time.time()
+        start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        log_info = logger.isEnabledFor(logging.INFO)
         
         # Log request
-        logger.info(f"→ {request.method} {request.url.path}")
+        if log_info:
+            logger.info("→ %s %s", method, path)
         
         # Log query params if present
-        if request.url.query:
-            logger.debug(f"  Query: {request.url.query}")
+        if scope.get("query_string") and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Query: %s", scope["query_string"].decode("latin-1"))
+        
+        status_code = 500
+        
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = (time.time() - start_time) * 1000
-            
-            # Log response
-            status_emoji = "✓" if response.status_code < 400 else "✗"
-            logger.info(
-                f"{status_emoji} {request.method} {request.url.path} "
-                f"→ {response.status_code} ({duration:.0f}ms)"
-            )
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            duration = (time.time() - start_time) * 1000
-            logger.error(
-                f"✗ {request.method} {request.url.path} "
-                f"→ ERROR ({duration:.0f}ms): {str(e)}"
-            )
+            duration = (time.perf_counter() - start_time) * 1000
+            logger.error("✗ %s %s → ERROR (%.0fms): %s", method, path, duration, e)
             raise
+        
+        # Log response
+        if log_info:
+            duration = (time.perf_counter() - start_time) * 1000
+            status_emoji = "✓" if status_code < 400 else "✗"
+            logger.info(
+                "%s %s %s → %s (%.0fms)",
+                status_emoji, method, path, status_code, duration
+            )
 
 
 def log_startup_info():
     """Log application startup information."""
-    from ..config import settings
+    from ..config import get_settings
+    settings = get_settings()
     
     logger.info("=" * 60)
     logger.info("VibeReader Backend Starting")
@@ -1,9 +1,9 @@
 """Annotation database models (highlights, notes, chat contexts)."""
-from sqlalchemy import String, Integer, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import String, Integer, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 import enum
-from .base import Base, TimestampMixin
+from .base import Base, BulkInsertMixin, TimestampMixin
 
 
 class HighlightColor(str, enum.Enum):
@@ -15,35 +15,46 @@ class HighlightColor(str, enum.Enum):
     PURPLE = "purple"
 
 
-class Highlight(Base, TimestampMixin):
+class Highlight(Base, TimestampMixin, BulkInsertMixin):
     """Highlight model - colored text highlights."""
     
     __tablename__ = "highlights"
+    __table_args__ = (
+        # Annotations are always looked up per book, either listed in
+        # creation order or matched at a CFI range
+        Index("ix_highlights_book_created", "book_id", "created_at"),
+        Index("ix_highlights_book_cfi", "book_id", "cfi_range"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    book_id: Mapped[int] = mapped_column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    book_id: Mapped[int] = mapped_column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
     
-    # EPUB location
-    cfi_range: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
+    # EPUB location. VARCHAR is stored at its actual length, so the 500 cap
+    # costs nothing in the index; equality lookups use ix_*_book_cfi.
+    cfi_range: Mapped[str] = mapped_column(String(500), nullable=False)
     
     # Highlight data
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    color: Mapped[HighlightColor] = mapped_column(SQLEnum(HighlightColor), nullable=False, default=HighlightColor.YELLOW)
+    color: Mapped[HighlightColor] = mapped_column(SQLEnum(HighlightColor, native_enum=False, length=16, validate_strings=True), nullable=False, default=HighlightColor.YELLOW)
     
     def __repr__(self) -> str:
         return f"<Highlight(id={self.id}, book_id={self.book_id}, color={self.color})>"
 
 
-class Note(Base, TimestampMixin):
+class Note(Base, TimestampMixin, BulkInsertMixin):
     """Note model - user annotations with text content."""
     
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_book_created", "book_id", "created_at"),
+        Index("ix_notes_book_cfi", "book_id", "cfi_range"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    book_id: Mapped[int] = mapped_column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    book_id: Mapped[int] = mapped_column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
     
     # EPUB location
-    cfi_range: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
+    cfi_range: Mapped[str] = mapped_column(String(500), nullable=False)
     
     # Note data
     text: Mapped[str] = mapped_column(Text, nullable=False)  # Selected text
@@ -53,16 +64,20 @@ class Note(Base, TimestampMixin):
         return f"<Note(id={self.id}, book_id={self.book_id})>"
 
 
-class ChatContext(Base, TimestampMixin):
+class ChatContext(Base, TimestampMixin, BulkInsertMixin):
     """ChatContext model - AI chat conversations about text selections."""
     
     __tablename__ = "chat_contexts"
+    __table_args__ = (
+        Index("ix_chat_contexts_book_created", "book_id", "created_at"),
+        Index("ix_chat_contexts_book_cfi", "book_id", "cfi_range"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    book_id: Mapped[int] = mapped_column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    book_id: Mapped[int] = mapped_column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
     
     # EPUB location
-    cfi_range: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
+    cfi_range: Mapped[str] = mapped_column(String(500), nullable=False)
     
     # Chat data
     text: Mapped[str] = mapped_column(Text, nullable=False)  # Selected text
@@ -1,27 +1,88 @@
 """SQLAlchemy base models."""
 from datetime import datetime
-from sqlalchemy import DateTime, Integer
+from sqlalchemy import DateTime, Integer, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.sql.expression import FunctionElement
 from typing import Optional
 
 
+class utcnow(FunctionElement):
+    """Current UTC time as a naive timestamp, evaluated by the database.
+    
+    Columns are timezone-naive and hold UTC, as datetime.utcnow() did.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    # now() is in the session time zone; naive columns must get UTC
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has one-second resolution. Keep milliseconds,
+    # padded to the microsecond format SQLAlchemy writes so values compare
+    # correctly as text.
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
 class Base(DeclarativeBase):
     """Base class for all database models."""
     pass
 
 
 class TimestampMixin:
-    """Mixin for created_at and updated_at timestamps."""
+    """Mixin for created_at and updated_at timestamps.
+    
+    Timestamps are stamped by the database in UTC (millisecond precision on
+    SQLite). The SQL-side default is also rendered into INSERTs so tables
+    created before server_default existed keep working. eager_defaults
+    fetches them back via RETURNING on flush, so committed objects don't
+    need a refresh() round-trip.
+    """
+    
+    __mapper_args__ = {"eager_defaults": True}
     
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        default=utcnow(),
+        server_default=utcnow(),
         nullable=False
     )
     
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        default=utcnow(),
+        server_default=utcnow(),
+        onupdate=utcnow(),
         nullable=False
     )
+
+
+class BulkInsertMixin:
+    """Mixin for inserting many rows in a single statement."""
+    
+    @classmethod
+    async def bulk_create(cls, session: AsyncSession, rows: list[dict]) -> list:
+        """Insert rows in one INSERT ... RETURNING and return the new objects in order.
+        
+        RETURNING also brings back database-generated values (id, timestamps),
+        so the objects need no refresh.
+        """
+        if not rows:
+            return []
+        result = await session.scalars(
+            insert(cls).returning(cls, sort_by_parameter_order=True),
+            rows,
+        )
+        return list(result)
@@ -1,12 +1,12 @@
 """Book database models."""
 from datetime import datetime
-from sqlalchemy import String, Integer, Float, Text, LargeBinary
+from sqlalchemy import String, Integer, Float, Text, LargeBinary, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 from typing import Optional
-from .base import Base, TimestampMixin
+from .base import Base, TimestampMixin, BulkInsertMixin, utcnow
 
 
-class Book(Base, TimestampMixin):
+class Book(Base, TimestampMixin, BulkInsertMixin):
     """Book model - stores EPUB metadata and file location."""
     
     __tablename__ = "books"
@@ -37,8 +37,14 @@ class Book(Base, TimestampMixin):
     language: Mapped[Optional[str]] = mapped_column(String(10))
     description: Mapped[Optional[str]] = mapped_column(Text)
     
-    # Import tracking
-    import_date: Mapped[datetime] = mapped_column(nullable=False, index=True)
+    # Import tracking (stamped by the database, like created_at)
+    import_date: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=utcnow(),
+        server_default=utcnow(),
+        nullable=False,
+        index=True
+    )
     
     def __repr__(self) -> str:
         return f"<Book(id={self.id}, title='{self.title}', author='{self.author}')>"
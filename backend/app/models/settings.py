@@ -30,8 +30,8 @@ class UserSettings(Base, TimestampMixin):
     font_size: Mapped[int] = mapped_column(Integer, nullable=False, default=16)
     font_family: Mapped[str] = mapped_column(String(100), nullable=False, default="serif")
     line_height: Mapped[float] = mapped_column(Float, nullable=False, default=1.6)
-    theme: Mapped[Theme] = mapped_column(SQLEnum(Theme), nullable=False, default=Theme.LIGHT)
-    page_mode: Mapped[PageMode] = mapped_column(SQLEnum(PageMode), nullable=False, default=PageMode.PAGINATED)
+    theme: Mapped[Theme] = mapped_column(SQLEnum(Theme, native_enum=False, length=16, validate_strings=True), nullable=False, default=Theme.LIGHT)
+    page_mode: Mapped[PageMode] = mapped_column(SQLEnum(PageMode, native_enum=False, length=16, validate_strings=True), nullable=False, default=PageMode.PAGINATED)
     
     # API settings (optional, for future AI features)
     api_base_url: Mapped[Optional[str]] = mapped_column(String(500))
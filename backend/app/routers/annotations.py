@@ -1,12 +1,14 @@
 """Annotations API endpoints (highlights, notes, chat contexts)."""
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated, List, Optional, Type
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, and_, delete, bindparam, update as sql_update
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models import Highlight, Note, ChatContext, HighlightColor
 
 router = APIRouter(prefix="/api/annotations", tags=["annotations"])
@@ -29,8 +31,11 @@ class HighlightResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class HighlightBulkCreate(BaseModel):
+    items: List[HighlightCreate]
 
 
 class HighlightUpdate(BaseModel):
@@ -53,8 +58,11 @@ class NoteResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NoteBulkCreate(BaseModel):
+    items: List[NoteCreate]
 
 
 class NoteUpdate(BaseModel):
@@ -79,248 +87,206 @@ class ChatContextResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class ChatContextUpdate(BaseModel):
-    ai_response: str
+class ChatContextBulkCreate(BaseModel):
+    items: List[ChatContextCreate]
 
 
-# Highlights endpoints
-@router.post("/highlights", response_model=HighlightResponse)
-async def create_highlight(
-    highlight: HighlightCreate,
-    db: AsyncSession = Depends(get_db)
-):
-    """Create a new highlight."""
-    db_highlight = Highlight(**highlight.model_dump())
-    db.add(db_highlight)
-    await db.commit()
-    await db.refresh(db_highlight)
-    return db_highlight
+class ChatContextUpdate(BaseModel):
+    ai_response: str
 
 
-@router.get("/highlights/book/{book_id}", response_model=List[HighlightResponse])
-async def get_highlights(
-    book_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get all highlights for a book."""
-    result = await db.execute(
-        select(Highlight)
-        .where(Highlight.book_id == book_id)
-        .order_by(Highlight.created_at)
+def rows_response(result) -> ORJSONResponse:
+    """Serialize plain result rows directly, skipping ORM objects and re-validation."""
+    return ORJSONResponse([dict(row) for row in result.mappings()])
+
+
+def make_crud_router(
+    *,
+    model,
+    create_schema: Type[BaseModel],
+    bulk_schema: Type[BaseModel],
+    response_schema: Type[BaseModel],
+    update_schema: Type[BaseModel],
+    prefix: str,
+    name: str,
+    id_param: str,
+    label: str,
+    update_doc: str,
+) -> APIRouter:
+    """Build the create/bulk/list/update/delete endpoints for an annotation model.
+    
+    Statements and payload adapters are built once here, so every
+    annotation type gets the same RETURNING-based handlers. id_param names
+    the item id in the path (e.g. highlight_id), as published in the API schema.
+    """
+    crud = APIRouter(prefix=prefix)
+    
+    # Columns selected by the list endpoint, matching the response schema.
+    # Rows come back in (book_id, created_at) index order; id breaks
+    # same-second ties.
+    list_by_book = (
+        select(*[getattr(model, field) for field in response_schema.model_fields])
+        .where(model.book_id == bindparam("book_id"))
+        .order_by(model.created_at, model.id)
     )
-    highlights = result.scalars().all()
-    return highlights
-
-
-@router.patch("/highlights/{highlight_id}", response_model=HighlightResponse)
-async def update_highlight(
-    highlight_id: int,
-    update: HighlightUpdate,
-    db: AsyncSession = Depends(get_db)
-):
-    """Update highlight color."""
-    result = await db.execute(
-        select(Highlight).where(Highlight.id == highlight_id)
+    update_fields = list(update_schema.model_fields)
+    update_item = (
+        sql_update(model)
+        .where(model.id == bindparam("item_id"))
+        .values({field: bindparam(f"new_{field}") for field in update_fields})
+        .returning(model)
     )
-    highlight = result.scalar_one_or_none()
+    delete_item = delete(model).where(model.id == bindparam("item_id")).returning(model.id)
+    rows_adapter = TypeAdapter(List[create_schema])
+    not_found = f"{label} not found"
     
-    if not highlight:
-        raise HTTPException(status_code=404, detail="Highlight not found")
+    async def insert_items(db: AsyncSession, rows: list[dict]) -> list:
+        try:
+            items = await model.bulk_create(db, rows)
+            await db.commit()
+        except IntegrityError:
+            # book_id is the only constraint an annotation row can violate
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Book not found")
+        return items
     
-    highlight.color = update.color
-    await db.commit()
-    await db.refresh(highlight)
-    return highlight
-
-
-@router.delete("/highlights/{highlight_id}")
-async def delete_highlight(
-    highlight_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Delete a highlight."""
-    result = await db.execute(
-        select(Highlight).where(Highlight.id == highlight_id)
-    )
-    highlight = result.scalar_one_or_none()
+    @crud.post("", response_model=response_schema, name=f"create_{name}",
+               description=f"Create a new {label.lower()}.")
+    async def create_item(
+        item: create_schema,
+        db: AsyncSession = Depends(get_db)
+    ):
+        [db_item] = await insert_items(db, [item.model_dump()])
+        return db_item
     
-    if not highlight:
-        raise HTTPException(status_code=404, detail="Highlight not found")
+    @crud.post("/bulk", response_model=List[response_schema], name=f"create_{name}s_bulk",
+               description=f"Create many {label.lower()}s in a single INSERT.")
+    async def create_items_bulk(
+        payload: bulk_schema,
+        db: AsyncSession = Depends(get_db)
+    ):
+        return await insert_items(db, rows_adapter.dump_python(payload.items))
     
-    await db.delete(highlight)
-    await db.commit()
-    return {"message": "Highlight deleted"}
-
-
-# Notes endpoints
-@router.post("/notes", response_model=NoteResponse)
-async def create_note(
-    note: NoteCreate,
-    db: AsyncSession = Depends(get_db)
-):
-    """Create a new note."""
-    db_note = Note(**note.model_dump())
-    db.add(db_note)
-    await db.commit()
-    await db.refresh(db_note)
-    return db_note
-
-
-@router.get("/notes/book/{book_id}", response_model=List[NoteResponse])
-async def get_notes(
-    book_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get all notes for a book."""
-    result = await db.execute(
-        select(Note)
-        .where(Note.book_id == book_id)
-        .order_by(Note.created_at)
-    )
-    notes = result.scalars().all()
-    return notes
+    @crud.get("/book/{book_id}", response_model=List[response_schema], name=f"get_{name}s",
+              description=f"Get all {label.lower()}s for a book.")
+    async def list_items(
+        book_id: int,
+        db: AsyncSession = Depends(get_read_db)
+    ):
+        result = await db.execute(list_by_book, {"book_id": book_id})
+        return rows_response(result)
+    
+    item_path = f"/{{{id_param}}}"
+    
+    @crud.patch(item_path, response_model=response_schema, name=f"update_{name}",
+                description=update_doc)
+    async def update_item_endpoint(
+        item_id: Annotated[int, Path(alias=id_param)],
+        update: update_schema,
+        db: AsyncSession = Depends(get_db)
+    ):
+        result = await db.execute(update_item, {
+            "item_id": item_id,
+            **{f"new_{field}": getattr(update, field) for field in update_fields},
+        })
+        item = result.scalar_one_or_none()
+        
+        if not item:
+            raise HTTPException(status_code=404, detail=not_found)
+        
+        await db.commit()
+        return item
+    
+    @crud.delete(item_path, name=f"delete_{name}",
+                 description=f"Delete a {label.lower()}.")
+    async def delete_item_endpoint(
+        item_id: Annotated[int, Path(alias=id_param)],
+        db: AsyncSession = Depends(get_db)
+    ):
+        result = await db.execute(delete_item, {"item_id": item_id})
+        
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        
+        await db.commit()
+        return {"message": f"{label} deleted"}
+    
+    return crud
+
+
+router.include_router(make_crud_router(
+    model=Highlight,
+    create_schema=HighlightCreate,
+    bulk_schema=HighlightBulkCreate,
+    response_schema=HighlightResponse,
+    update_schema=HighlightUpdate,
+    prefix="/highlights",
+    name="highlight",
+    id_param="highlight_id",
+    label="Highlight",
+    update_doc="Update highlight color.",
+))
+router.include_router(make_crud_router(
+    model=Note,
+    create_schema=NoteCreate,
+    bulk_schema=NoteBulkCreate,
+    response_schema=NoteResponse,
+    update_schema=NoteUpdate,
+    prefix="/notes",
+    name="note",
+    id_param="note_id",
+    label="Note",
+    update_doc="Update note content.",
+))
+router.include_router(make_crud_router(
+    model=ChatContext,
+    create_schema=ChatContextCreate,
+    bulk_schema=ChatContextBulkCreate,
+    response_schema=ChatContextResponse,
+    update_schema=ChatContextUpdate,
+    prefix="/chat-contexts",
+    name="chat_context",
+    id_param="chat_id",
+    label="Chat context",
+    update_doc="Update chat context with AI response.",
+))
+
+
+# Lookups by CFI range
+NOTE_BY_RANGE = select(Note).where(
+    and_(Note.book_id == bindparam("book_id"), Note.cfi_range == bindparam("cfi_range"))
+)
+CHAT_CONTEXTS_BY_RANGE = select(ChatContext).where(
+    and_(ChatContext.book_id == bindparam("book_id"), ChatContext.cfi_range == bindparam("cfi_range"))
+)
 
 
 @router.get("/notes/range/{book_id}", response_model=Optional[NoteResponse])
 async def get_note_by_range(
     book_id: int,
     cfi_range: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get note by CFI range (cfi_range as query parameter)."""
     result = await db.execute(
-        select(Note).where(
-            and_(Note.book_id == book_id, Note.cfi_range == cfi_range)
-        )
-    )
-    note = result.scalar_one_or_none()
-    return note
-
-
-@router.patch("/notes/{note_id}", response_model=NoteResponse)
-async def update_note(
-    note_id: int,
-    update: NoteUpdate,
-    db: AsyncSession = Depends(get_db)
-):
-    """Update note content."""
-    result = await db.execute(
-        select(Note).where(Note.id == note_id)
+        NOTE_BY_RANGE, {"book_id": book_id, "cfi_range": cfi_range}
     )
     note = result.scalar_one_or_none()
-    
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
-    note.note_content = update.note_content
-    await db.commit()
-    await db.refresh(note)
     return note
 
 
-@router.delete("/notes/{note_id}")
-async def delete_note(
-    note_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Delete a note."""
-    result = await db.execute(
-        select(Note).where(Note.id == note_id)
-    )
-    note = result.scalar_one_or_none()
-    
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
-    await db.delete(note)
-    await db.commit()
-    return {"message": "Note deleted"}
-
-
-# Chat contexts endpoints
-@router.post("/chat-contexts", response_model=ChatContextResponse)
-async def create_chat_context(
-    chat: ChatContextCreate,
-    db: AsyncSession = Depends(get_db)
-):
-    """Create a new chat context."""
-    db_chat = ChatContext(**chat.model_dump())
-    db.add(db_chat)
-    await db.commit()
-    await db.refresh(db_chat)
-    return db_chat
-
-
-@router.get("/chat-contexts/book/{book_id}", response_model=List[ChatContextResponse])
-async def get_chat_contexts(
-    book_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get all chat contexts for a book."""
-    result = await db.execute(
-        select(ChatContext)
-        .where(ChatContext.book_id == book_id)
-        .order_by(ChatContext.created_at)
-    )
-    chats = result.scalars().all()
-    return chats
-
-
 @router.get("/chat-contexts/range/{book_id}", response_model=List[ChatContextResponse])
 async def get_chat_contexts_by_range(
     book_id: int,
     cfi_range: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get chat contexts by CFI range (cfi_range as query parameter)."""
     result = await db.execute(
-        select(ChatContext).where(
-            and_(ChatContext.book_id == book_id, ChatContext.cfi_range == cfi_range)
-        )
+        CHAT_CONTEXTS_BY_RANGE, {"book_id": book_id, "cfi_range": cfi_range}
     )
     chats = result.scalars().all()
     return chats
-
-
-@router.patch("/chat-contexts/{chat_id}", response_model=ChatContextResponse)
-async def update_chat_context(
-    chat_id: int,
-    update: ChatContextUpdate,
-    db: AsyncSession = Depends(get_db)
-):
-    """Update chat context with AI response."""
-    result = await db.execute(
-        select(ChatContext).where(ChatContext.id == chat_id)
-    )
-    chat = result.scalar_one_or_none()
-    
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat context not found")
-    
-    chat.ai_response = update.ai_response
-    await db.commit()
-    await db.refresh(chat)
-    return chat
-
-
-@router.delete("/chat-contexts/{chat_id}")
-async def delete_chat_context(
-    chat_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """Delete a chat context."""
-    result = await db.execute(
-        select(ChatContext).where(ChatContext.id == chat_id)
-    )
-    chat = result.scalar_one_or_none()
-    
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat context not found")
-    
-    await db.delete(chat)
-    await db.commit()
-    return {"message": "Chat context deleted"}
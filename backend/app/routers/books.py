@@ -1,14 +1,19 @@
 """Books API endpoints."""
+import asyncio
+import os
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response
+from fastapi.responses import FileResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from pydantic import BaseModel
+from sqlalchemy import select, func, delete, or_, bindparam, update as sql_update
+from pydantic import BaseModel, ConfigDict, Field
 import logging
 
-from ..database import get_db
-from ..models import Book
+from ..database import get_db, get_read_db
+from ..models import Book, Highlight, Note
+from ..models.base import utcnow
 from ..services.epub_service import EpubService
 
 router = APIRouter(prefix="/api/books", tags=["books"])
@@ -36,14 +41,69 @@ class BookResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BookListItem(BookResponse):
+    highlight_count: int = 0
+    note_count: int = 0
+
+
+# Columns selected by the library listing, matching BookListItem. Annotation
+# counts are correlated subqueries over the (book_id, ...) indexes, so the
+# whole page loads in one statement instead of a count query per book.
+BOOK_COLUMNS = [getattr(Book, name) for name in BookResponse.model_fields] + [
+    select(func.count(Highlight.id))
+    .where(Highlight.book_id == Book.id)
+    .correlate(Book)
+    .scalar_subquery()
+    .label("highlight_count"),
+    select(func.count(Note.id))
+    .where(Note.book_id == Book.id)
+    .correlate(Book)
+    .scalar_subquery()
+    .label("note_count"),
+]
+
+# Statements built once at import and executed with bound parameters
+BOOKS_PAGE = (
+    select(*BOOK_COLUMNS)
+    .order_by(Book.import_date.desc(), Book.id.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+BOOK_BY_ID = select(Book).where(Book.id == bindparam("book_id"))
+BOOK_BY_HASH = select(Book.title, Book.author).where(Book.file_hash == bindparam("file_hash"))
+EXISTING_HASHES = select(Book.file_hash).where(
+    Book.file_hash.in_(bindparam("file_hashes", expanding=True))
+)
+BOOK_FILE = select(Book.title, Book.author, Book.file_path, Book.file_hash).where(Book.id == bindparam("book_id"))
+DELETE_BOOK = delete(Book).where(Book.id == bindparam("book_id")).returning(Book.file_path)
+
+# EPUBs parsed at once by a bulk import; each parse holds a worker thread
+# and a decoded cover image
+BULK_EXTRACT_CONCURRENCY = os.cpu_count() or 4
+
+
+class BulkImportResponse(BaseModel):
+    imported: List[BookResponse]
+    skipped: List[str]
 
 
 class ProgressUpdate(BaseModel):
     current_cfi: Optional[str] = None
     current_chapter: Optional[int] = None
-    percentage: Optional[float] = None
+    # Reader progress in percent; out-of-range values are rejected while parsing
+    percentage: Optional[float] = Field(None, ge=0, le=100)
+
+
+def _etag_matches(if_none_match: str, file_hash: str) -> bool:
+    """Check an If-None-Match header against a book's file hash."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/").strip('"') == file_hash:
+            return True
+    return False
 
 
 @router.post("/import", response_model=BookResponse)
@@ -58,33 +118,28 @@ async def import_book(
         raise HTTPException(status_code=400, detail="Only EPUB files are supported")
     
     try:
-        # Read file content
-        content = await file.read()
-        await file.seek(0)  # Reset for reuse
+        # Write upload to disk once, hashing it for duplicate detection
+        tmp_path, file_hash, file_size = await epub_service.save_upload(file)
         
-        # Calculate hash for duplicate detection
-        file_hash = await epub_service.calculate_file_hash(content)
+        try:
+            # Check for duplicates (unique index lookup; skip loading the cover)
+            result = await db.execute(BOOK_BY_HASH, {"file_hash": file_hash})
+            existing_book = result.one_or_none()
+            
+            if existing_book:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"This book is already in your library: '{existing_book.title}' by {existing_book.author}"
+                )
+            
+            # Save file to storage
+            file_path = epub_service.store_upload(tmp_path, file_hash)
+        finally:
+            # No-op once the upload has been moved into place
+            tmp_path.unlink(missing_ok=True)
         
-        # Check for duplicates
-        result = await db.execute(
-            select(Book).where(Book.file_hash == file_hash)
-        )
-        existing_book = result.scalar_one_or_none()
-        
-        if existing_book:
-            raise HTTPException(
-                status_code=409,
-                detail=f"This book is already in your library: '{existing_book.title}' by {existing_book.author}"
-            )
-        
-        # Save file to storage
-        file_path = await epub_service.save_epub_file(file, file_hash)
-        
-        # Extract metadata
-        metadata = await epub_service.extract_metadata(file_path)
-        
-        # Extract cover
-        cover_image = await epub_service.extract_cover(file_path)
+        # Extract metadata and cover (parses the EPUB once)
+        metadata, cover_image = await epub_service.process_epub(file_path)
         
         # Create book record
         book = Book(
@@ -92,18 +147,16 @@ async def import_book(
             author=metadata["author"],
             publisher=metadata["publisher"],
             file_path=str(file_path),
-            file_size=len(content),
+            file_size=file_size,
             file_hash=file_hash,
             cover_image=cover_image,
             isbn=metadata["isbn"],
             language=metadata["language"],
             description=metadata["description"],
-            import_date=datetime.utcnow(),
         )
         
         db.add(book)
         await db.commit()
-        await db.refresh(book)
         
         return book
         
@@ -111,36 +164,131 @@ async def import_book(
         raise
     except Exception as e:
         await db.rollback()
-        print(f"Error importing book: {e}")
+        logger.exception("Error importing book: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to import book: {str(e)}")
 
 
-@router.get("", response_model=List[BookResponse])
+async def _extract_book_row(
+    slots: asyncio.Semaphore, file_path: Path, file_hash: str, file_size: int
+) -> dict:
+    """Build the books row for a stored EPUB from its metadata and cover."""
+    async with slots:
+        metadata, cover_image = await epub_service.process_epub(file_path)
+    return {
+        "title": metadata["title"],
+        "author": metadata["author"],
+        "publisher": metadata["publisher"],
+        "file_path": str(file_path),
+        "file_size": file_size,
+        "file_hash": file_hash,
+        "cover_image": cover_image,
+        "isbn": metadata["isbn"],
+        "language": metadata["language"],
+        "description": metadata["description"],
+    }
+
+
+async def _discard_unreferenced(db: AsyncSession, stored: list) -> None:
+    """Delete stored files of a failed bulk import that no book row points to.
+    
+    A concurrent single import of the same EPUB may have committed its row
+    (and file, which has the same name) in the meantime; those are kept.
+    """
+    try:
+        result = await db.execute(
+            EXISTING_HASHES, {"file_hashes": [file_hash for _, file_hash, _ in stored]}
+        )
+        referenced = set(result.scalars())
+    except Exception as e:
+        # Leaking a file is better than deleting one a book still uses
+        logger.warning("Could not check stored files after failed import: %s", e)
+        return
+    
+    for file_path, file_hash, _ in stored:
+        if file_hash not in referenced:
+            file_path.unlink(missing_ok=True)
+
+
+@router.post("/import-bulk", response_model=BulkImportResponse)
+async def import_books_bulk(
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """Import many EPUB files at once (e.g. migrating a library).
+    
+    Uploads are saved and hashed concurrently, checked for duplicates in one
+    query and inserted in one INSERT. Non-EPUB files, uploads that could not
+    be saved and books already in the library are skipped and reported by
+    filename.
+    """
+    skipped = [f.filename for f in files if not f.filename.endswith('.epub')]
+    epubs = [f for f in files if f.filename.endswith('.epub')]
+    
+    # Let every upload finish so the temp files of the ones that succeeded
+    # are cleaned up below even when others fail
+    results = await asyncio.gather(
+        *(epub_service.save_upload(f) for f in epubs), return_exceptions=True
+    )
+    saved = []
+    for upload, result in zip(epubs, results):
+        if isinstance(result, BaseException):
+            # save_upload already removed its own temp file
+            logger.warning("Could not save upload %s: %s", upload.filename, result)
+            skipped.append(upload.filename)
+        else:
+            saved.append((upload, *result))
+    stored = []
+    
+    try:
+        result = await db.execute(
+            EXISTING_HASHES, {"file_hashes": [file_hash for _, _, file_hash, _ in saved]}
+        )
+        seen = set(result.scalars())
+        
+        for upload, tmp_path, file_hash, file_size in saved:
+            if file_hash in seen:
+                skipped.append(upload.filename)
+                continue
+            seen.add(file_hash)
+            stored.append((epub_service.store_upload(tmp_path, file_hash), file_hash, file_size))
+    finally:
+        # No-op for uploads that were moved into place
+        for _, tmp_path, _, _ in saved:
+            tmp_path.unlink(missing_ok=True)
+    
+    slots = asyncio.Semaphore(BULK_EXTRACT_CONCURRENCY)
+    try:
+        rows = await asyncio.gather(*(_extract_book_row(slots, *entry) for entry in stored))
+        books = await Book.bulk_create(db, rows)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.exception("Error importing books: %s", e)
+        await _discard_unreferenced(db, stored)
+        raise HTTPException(status_code=500, detail=f"Failed to import books: {str(e)}")
+    
+    return {"imported": books, "skipped": skipped}
+
+
+@router.get("", response_model=List[BookListItem])
 async def get_books(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all books in library."""
-    result = await db.execute(
-        select(Book)
-        .order_by(Book.import_date.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-    books = result.scalars().all()
-    return books
+    result = await db.execute(BOOKS_PAGE, {"skip": skip, "limit": limit})
+    # Plain rows serialize directly; no ORM objects or response re-validation
+    return ORJSONResponse([dict(row) for row in result.mappings()])
 
 
 @router.get("/{book_id}", response_model=BookResponse)
 async def get_book(
     book_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific book by ID."""
-    result = await db.execute(
-        select(Book).where(Book.id == book_id)
-    )
+    result = await db.execute(BOOK_BY_ID, {"book_id": book_id})
     book = result.scalar_one_or_none()
     
     if not book:
@@ -152,41 +300,50 @@ async def get_book(
 @router.get("/{book_id}/file")
 async def get_book_file(
     book_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get the EPUB file for a book."""
-    logger.info(f"📖 Fetching EPUB file for book_id={book_id}")
+    logger.info("📖 Fetching EPUB file for book_id=%s", book_id)
     
-    result = await db.execute(
-        select(Book).where(Book.id == book_id)
-    )
-    book = result.scalar_one_or_none()
+    result = await db.execute(BOOK_FILE, {"book_id": book_id})
+    book = result.one_or_none()
     
     if not book:
-        logger.warning(f"❌ Book not found: book_id={book_id}")
+        logger.warning("❌ Book not found: book_id=%s", book_id)
         raise HTTPException(status_code=404, detail="Book not found")
     
-    logger.info(f"📚 Found book: '{book.title}' by {book.author}")
-    logger.info(f"📁 File path: {book.file_path}")
+    logger.info("📚 Found book: '%s' by %s", book.title, book.author)
+    logger.info("📁 File path: %s", book.file_path)
+    
+    # Stored files are named by content hash and never change, so the hash is
+    # a strong ETag and clients can cache the download indefinitely
+    cache_headers = {
+        "ETag": f'"{book.file_hash}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, book.file_hash):
+        logger.info("✓ EPUB not modified, skipping download")
+        return Response(status_code=304, headers=cache_headers)
     
     try:
-        file_content = await epub_service.get_epub_file(book.file_path)
-        file_size_mb = len(file_content) / (1024 * 1024)
-        logger.info(f"✓ Serving EPUB file: {file_size_mb:.2f}MB")
+        file_stat = Path(book.file_path).stat()
+        logger.info("✓ Serving EPUB file: %.2fMB", file_stat.st_size / (1024 * 1024))
         
-        from fastapi.responses import Response
-        return Response(
-            content=file_content,
+        # Stream from disk instead of loading the whole EPUB into memory
+        return FileResponse(
+            path=book.file_path,
             media_type="application/epub+zip",
-            headers={
-                "Content-Disposition": f'attachment; filename="{book.title}.epub"'
-            }
+            filename=f"{book.title}.epub",
+            stat_result=file_stat,
+            headers=cache_headers,
         )
     except FileNotFoundError as e:
-        logger.error(f"❌ EPUB file not found: {book.file_path}")
+        logger.error("❌ EPUB file not found: %s", book.file_path)
         raise HTTPException(status_code=404, detail="EPUB file not found")
     except Exception as e:
-        logger.error(f"❌ Error retrieving file: {str(e)}")
+        logger.exception("❌ Error retrieving file: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve file: {str(e)}")
 
 
@@ -197,27 +354,33 @@ async def update_progress(
     db: AsyncSession = Depends(get_db)
 ):
     """Update reading progress for a book."""
-    result = await db.execute(
-        select(Book).where(Book.id == book_id)
-    )
+    changes = progress.model_dump(exclude_none=True)
+    
+    if changes:
+        # Update provided fields in a single UPDATE ... RETURNING, matching only
+        # if something differs so duplicate page-turn events don't write
+        result = await db.execute(
+            sql_update(Book)
+            .where(
+                Book.id == book_id,
+                or_(*(getattr(Book, k).is_distinct_from(v) for k, v in changes.items())),
+            )
+            .values(**changes, last_read_date=utcnow())
+            .returning(Book)
+        )
+        book = result.scalar_one_or_none()
+        
+        if book:
+            await db.commit()
+            return book
+    
+    # Nothing to change: return the stored row without writing
+    result = await db.execute(BOOK_BY_ID, {"book_id": book_id})
     book = result.scalar_one_or_none()
     
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
-    # Update fields
-    if progress.current_cfi is not None:
-        book.current_cfi = progress.current_cfi
-    if progress.current_chapter is not None:
-        book.current_chapter = progress.current_chapter
-    if progress.percentage is not None:
-        book.percentage = progress.percentage
-    
-    book.last_read_date = datetime.utcnow()
-    
-    await db.commit()
-    await db.refresh(book)
-    
     return book
 
 
@@ -227,25 +390,21 @@ async def delete_book(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a book from library."""
-    result = await db.execute(
-        select(Book).where(Book.id == book_id)
-    )
-    book = result.scalar_one_or_none()
+    # Delete from database (cascade will handle annotations)
+    result = await db.execute(DELETE_BOOK, {"book_id": book_id})
+    stored_path = result.scalar_one_or_none()
     
-    if not book:
+    if stored_path is None:
         raise HTTPException(status_code=404, detail="Book not found")
     
+    await db.commit()
+    
     # Delete file from storage
     try:
-        from pathlib import Path
-        file_path = Path(book.file_path)
+        file_path = Path(stored_path)
         if file_path.exists():
             file_path.unlink()
     except Exception as e:
-        print(f"Warning: Could not delete file: {e}")
-    
-    # Delete from database (cascade will handle annotations)
-    await db.delete(book)
-    await db.commit()
+        logger.warning("Could not delete file: %s", e)
     
     return {"message": "Book deleted successfully"}
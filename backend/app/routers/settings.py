@@ -1,15 +1,28 @@
 """Settings API endpoints."""
+import asyncio
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
-from ..database import get_db
+from ..database import get_db, AsyncSessionLocal
 from ..models import UserSettings, Theme, PageMode
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
+# The settings table holds a single row; keep it in memory between requests
+_settings_cache: Optional[UserSettings] = None
+_settings_lock = asyncio.Lock()
+
+SELECT_SETTINGS = select(UserSettings)
+
+
+def invalidate_settings_cache():
+    """Drop the cached settings row so the next read reloads it."""
+    global _settings_cache
+    _settings_cache = None
+
 
 # Pydantic schemas
 class SettingsResponse(BaseModel):
@@ -23,8 +36,7 @@ class SettingsResponse(BaseModel):
     api_model_name: Optional[str]
     api_key: Optional[str]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ReadingSettingsUpdate(BaseModel):
@@ -42,19 +54,30 @@ class ApiSettingsUpdate(BaseModel):
 
 
 @router.get("", response_model=SettingsResponse)
-async def get_settings(db: AsyncSession = Depends(get_db)):
-    """Get user settings (creates default if none exist)."""
-    result = await db.execute(select(UserSettings))
-    settings = result.scalar_one_or_none()
+async def get_settings():
+    """Get user settings (creates default if none exist).
     
-    if not settings:
-        # Create default settings
-        settings = UserSettings()
-        db.add(settings)
-        await db.commit()
-        await db.refresh(settings)
+    Served from memory; a session is only opened when the cache is empty.
+    """
+    global _settings_cache
+    if _settings_cache is not None:
+        return _settings_cache
     
-    return settings
+    async with _settings_lock:
+        if _settings_cache is None:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(SELECT_SETTINGS)
+                settings = result.scalar_one_or_none()
+                
+                if not settings:
+                    # Create default settings
+                    settings = UserSettings()
+                    db.add(settings)
+                    await db.commit()
+            
+            _settings_cache = settings
+    
+    return _settings_cache
 
 
 @router.patch("/reading", response_model=SettingsResponse)
@@ -63,27 +86,32 @@ async def update_reading_settings(
     db: AsyncSession = Depends(get_db)
 ):
     """Update reading settings."""
-    result = await db.execute(select(UserSettings))
-    settings = result.scalar_one_or_none()
-    
-    if not settings:
-        settings = UserSettings()
-        db.add(settings)
-    
-    # Update fields
-    if update.font_size is not None:
-        settings.font_size = update.font_size
-    if update.font_family is not None:
-        settings.font_family = update.font_family
-    if update.line_height is not None:
-        settings.line_height = update.line_height
-    if update.theme is not None:
-        settings.theme = update.theme
-    if update.page_mode is not None:
-        settings.page_mode = update.page_mode
-    
-    await db.commit()
-    await db.refresh(settings)
+    global _settings_cache
+    # Held until the cache is updated so a concurrent cold read can't cache
+    # the row it loaded before this commit
+    async with _settings_lock:
+        result = await db.execute(SELECT_SETTINGS)
+        settings = result.scalar_one_or_none()
+        
+        if not settings:
+            settings = UserSettings()
+            db.add(settings)
+        
+        # Update fields
+        if update.font_size is not None:
+            settings.font_size = update.font_size
+        if update.font_family is not None:
+            settings.font_family = update.font_family
+        if update.line_height is not None:
+            settings.line_height = update.line_height
+        if update.theme is not None:
+            settings.theme = update.theme
+        if update.page_mode is not None:
+            settings.page_mode = update.page_mode
+        
+        await db.commit()
+        
+        _settings_cache = settings
     return settings
 
 
@@ -93,21 +121,26 @@ async def update_api_settings(
     db: AsyncSession = Depends(get_db)
 ):
     """Update API settings."""
-    result = await db.execute(select(UserSettings))
-    settings = result.scalar_one_or_none()
-    
-    if not settings:
-        settings = UserSettings()
-        db.add(settings)
-    
-    # Update fields
-    if update.api_base_url is not None:
-        settings.api_base_url = update.api_base_url
-    if update.api_model_name is not None:
-        settings.api_model_name = update.api_model_name
-    if update.api_key is not None:
-        settings.api_key = update.api_key
-    
-    await db.commit()
-    await db.refresh(settings)
+    global _settings_cache
+    # Held until the cache is updated so a concurrent cold read can't cache
+    # the row it loaded before this commit
+    async with _settings_lock:
+        result = await db.execute(SELECT_SETTINGS)
+        settings = result.scalar_one_or_none()
+        
+        if not settings:
+            settings = UserSettings()
+            db.add(settings)
+        
+        # Update fields
+        if update.api_base_url is not None:
+            settings.api_base_url = update.api_base_url
+        if update.api_model_name is not None:
+            settings.api_model_name = update.api_model_name
+        if update.api_key is not None:
+            settings.api_key = update.api_key
+        
+        await db.commit()
+        
+        _settings_cache = settings
     return settings
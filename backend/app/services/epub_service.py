@@ -1,147 +1,268 @@
 """EPUB file processing service."""
+import asyncio
 import hashlib
-import base64
+import logging
+import os
+import posixpath
+import tempfile
+import zipfile
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import unquote
 from fastapi import UploadFile
-import ebooklib
-from ebooklib import epub
-from PIL import Image
 from io import BytesIO
-from ..config import settings
+from ..config import get_settings
+
+try:
+    # SIMD-accelerated base64 for cover data URIs
+    import pybase64 as b64
+except ImportError:
+    import base64 as b64
+
+settings = get_settings()
+logger = logging.getLogger("vibereader.epub")
+
+# Read uploads in 1MB chunks so memory use doesn't grow with EPUB size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Cover images embedded without re-encoding when they already fit
+JPEG_MAGIC = b"\xff\xd8\xff"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+MAX_PNG_COVER_BYTES = 200 * 1024
+
+# XML namespaces used by EPUB container and package (OPF) documents
+CONTAINER_NS = "urn:oasis:names:tc:opendocument:xmlns:container"
+OPF_NS = "http://www.idpf.org/2007/opf"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+
+# Metadata used when an EPUB can't be parsed
+DEFAULT_METADATA = {
+    "title": "Unknown Title",
+    "author": "Unknown Author",
+    "publisher": None,
+    "language": None,
+    "description": None,
+    "isbn": None,
+}
+
+
+def _hash_and_write(hasher, out, chunk: bytes) -> None:
+    """Feed a chunk to the hasher and append it to the output file."""
+    hasher.update(chunk)
+    out.write(chunk)
 
 
 class EpubService:
     """Service for processing EPUB files."""
     
     @staticmethod
-    async def calculate_file_hash(file_content: bytes) -> str:
-        """Calculate SHA256 hash of file content."""
-        return hashlib.sha256(file_content).hexdigest()
+    async def save_upload(file: UploadFile) -> Tuple[Path, str, int]:
+        """Stream an upload to a temporary file, hashing it on the way.
+        
+        Returns the temporary path, the SHA256 hex digest and the size in bytes.
+        """
+        if not settings.is_desktop:
+            raise NotImplementedError("Cloud storage not yet implemented")
+        
+        hasher = hashlib.sha256()
+        file_size = 0
+        fd, tmp_name = tempfile.mkstemp(suffix=".part", dir=settings.books_dir)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    # sha256 releases the GIL on large buffers; hash and write
+                    # off the event loop so other requests keep being served
+                    await asyncio.to_thread(_hash_and_write, hasher, out, chunk)
+                    file_size += len(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        return tmp_path, hasher.hexdigest(), file_size
+    
+    @staticmethod
+    def store_upload(tmp_path: Path, file_hash: str) -> Path:
+        """Move a saved upload to its final location (named by hash)."""
+        file_path = settings.books_dir / f"{file_hash}.epub"
+        os.replace(tmp_path, file_path)
+        return file_path
+    
+    @staticmethod
+    def _read_package(archive: zipfile.ZipFile):
+        """Parse the OPF package document; returns its root and directory in the ZIP."""
+        # Imported on first use to keep XML/imaging libraries off the startup path
+        from lxml import etree
+        
+        # Uploaded files are untrusted: don't expand entities or fetch DTDs
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        container = etree.fromstring(archive.read("META-INF/container.xml"), parser)
+        opf_path = container.find(f".//{{{CONTAINER_NS}}}rootfile").get("full-path")
+        opf = etree.fromstring(archive.read(opf_path), parser)
+        return opf, posixpath.dirname(opf_path)
     
     @staticmethod
-    async def extract_metadata(file_path: Path) -> Dict[str, Any]:
-        """Extract metadata from EPUB file."""
+    def _metadata_from_opf(opf) -> Dict[str, Any]:
+        """Extract metadata from the OPF <dc:*> elements."""
         try:
-            book = epub.read_epub(str(file_path))
-            
-            # Extract basic metadata
-            title = book.get_metadata('DC', 'title')
-            title = title[0][0] if title else "Unknown Title"
-            
-            author = book.get_metadata('DC', 'creator')
-            author = author[0][0] if author else "Unknown Author"
-            
-            publisher = book.get_metadata('DC', 'publisher')
-            publisher = publisher[0][0] if publisher else None
+            def dc_text(name: str) -> Optional[str]:
+                text = opf.findtext(f".//{{{DC_NS}}}{name}")
+                return (text.strip() or None) if text else None
             
-            language = book.get_metadata('DC', 'language')
-            language = language[0][0] if language else None
-            
-            description = book.get_metadata('DC', 'description')
-            description = description[0][0] if description else None
-            
-            # Try to get ISBN
-            isbn = book.get_metadata('DC', 'identifier')
+            # Try to get ISBN (from the identifier value or its scheme)
             isbn_value = None
-            if isbn:
-                for identifier in isbn:
-                    if 'ISBN' in str(identifier).upper():
-                        isbn_value = identifier[0]
-                        break
+            for identifier in opf.iterfind(f".//{{{DC_NS}}}identifier"):
+                text = identifier.text or ""
+                if 'ISBN' in " ".join([text, *identifier.attrib.values()]).upper():
+                    isbn_value = text.strip()
+                    break
             
             return {
-                "title": title,
-                "author": author,
-                "publisher": publisher,
-                "language": language,
-                "description": description,
+                "title": dc_text("title") or "Unknown Title",
+                "author": dc_text("creator") or "Unknown Author",
+                "publisher": dc_text("publisher"),
+                "language": dc_text("language"),
+                "description": dc_text("description"),
                 "isbn": isbn_value,
             }
         except Exception as e:
-            print(f"Error extracting metadata: {e}")
-            return {
-                "title": "Unknown Title",
-                "author": "Unknown Author",
-                "publisher": None,
-                "language": None,
-                "description": None,
-                "isbn": None,
-            }
+            logger.warning("Error extracting metadata: %s", e)
+            return dict(DEFAULT_METADATA)
     
     @staticmethod
-    async def extract_cover(file_path: Path) -> Optional[str]:
-        """Extract cover image from EPUB and return as base64."""
-        try:
-            book = epub.read_epub(str(file_path))
-            
-            # Try to find cover image
-            cover_image = None
-            
-            # Method 1: Look for cover in metadata
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_COVER:
-                    cover_image = item.get_content()
-                    break
-            
-            # Method 2: Look for cover in manifest
-            if not cover_image:
-                for item in book.get_items_of_type(ebooklib.ITEM_IMAGE):
-                    if 'cover' in item.get_name().lower():
-                        cover_image = item.get_content()
-                        break
-            
-            # Method 3: Use first image
-            if not cover_image:
-                images = list(book.get_items_of_type(ebooklib.ITEM_IMAGE))
-                if images:
-                    cover_image = images[0].get_content()
-            
-            if cover_image:
-                # Convert to base64
-                image = Image.open(BytesIO(cover_image))
-                
-                # Resize if too large
-                max_size = (400, 600)
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Convert to base64
-                buffered = BytesIO()
-                image.save(buffered, format="JPEG", quality=85)
-                img_str = base64.b64encode(buffered.getvalue()).decode()
-                
-                return f"data:image/jpeg;base64,{img_str}"
-            
-            return None
-        except Exception as e:
-            print(f"Error extracting cover: {e}")
+    def _find_cover_image(archive: zipfile.ZipFile, opf, opf_dir: str) -> Optional[bytes]:
+        """Locate the cover image in the manifest and read it from the ZIP."""
+        images = [
+            item for item in opf.iterfind(f"{{{OPF_NS}}}manifest/{{{OPF_NS}}}item")
+            if (item.get("media-type") or "").startswith("image/")
+        ]
+        cover = None
+        
+        # Fast path: the OPF <meta name="cover" content="..."/> names the
+        # manifest id of the cover image directly
+        cover_meta = opf.find(f".//{{{OPF_NS}}}meta[@name='cover']")
+        if cover_meta is not None:
+            cover_id = cover_meta.get("content")
+            cover = next((item for item in images if item.get("id") == cover_id), None)
+        
+        # Method 1: EPUB3 cover-image manifest property
+        if cover is None:
+            cover = next(
+                (item for item in images if "cover-image" in (item.get("properties") or "").split()),
+                None,
+            )
+        
+        # Method 2: Look for cover in image names
+        if cover is None:
+            cover = next((item for item in images if "cover" in item.get("href", "").lower()), None)
+        
+        # Method 3: Use first image
+        if cover is None and images:
+            cover = images[0]
+        
+        if cover is None:
             return None
+        # Manifest hrefs are URL-encoded and relative to the OPF file
+        return archive.read(posixpath.normpath(posixpath.join(opf_dir, unquote(cover.get("href")))))
     
     @staticmethod
-    async def save_epub_file(file: UploadFile, file_hash: str) -> Path:
-        """Save EPUB file to local storage."""
-        if not settings.is_desktop:
-            raise NotImplementedError("Cloud storage not yet implemented")
+    def _cover_data_url(cover_image: bytes) -> str:
+        """Turn cover image bytes into a (resized) base64 data URI.
         
-        # Ensure books directory exists
-        settings.books_dir.mkdir(parents=True, exist_ok=True)
+        Small JPEG and PNG covers are embedded as is; anything else is
+        decoded, shrunk to fit 400x600 and re-encoded as JPEG.
+        """
+        from PIL import Image
         
-        # Save with hash as filename
-        file_path = settings.books_dir / f"{file_hash}.epub"
+        is_jpeg = cover_image.startswith(JPEG_MAGIC)
+        is_png = cover_image.startswith(PNG_MAGIC)
         
-        # Write file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Opening only reads the image header; pixels are decoded on demand
+        image = Image.open(BytesIO(cover_image))
         
-        return file_path
+        max_size = (400, 600)
+        fits = image.width <= max_size[0] and image.height <= max_size[1]
+        if fits and (
+            (is_jpeg and image.mode in ("RGB", "L"))
+            or (is_png and len(cover_image) <= MAX_PNG_COVER_BYTES)
+        ):
+            # Already small enough: use it as is rather than paying for a
+            # decode/re-encode round trip
+            img_str = b64.b64encode(cover_image).decode('ascii')
+            return f"data:image/{'jpeg' if is_jpeg else 'png'};base64,{img_str}"
+        
+        if is_jpeg:
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of
+            # decoding the full-resolution image only to shrink it
+            image.draft("RGB", max_size)
+        scale = min(max_size[0] / image.width, max_size[1] / image.height)
+        if scale < 1:
+            # reducing_gap lets Pillow box-reduce by an integer factor first,
+            # so the resampling filter only runs near the target size
+            new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            resample = Image.Resampling[settings.cover_resample_filter.upper()]
+            image = image.resize(new_size, resample, reducing_gap=3.0)
+        
+        if image.mode not in ("RGB", "L"):
+            # JPEG has no alpha or palette: flatten onto white
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        
+        # Convert to base64
+        buffered = BytesIO()
+        image.save(buffered, format="JPEG", quality=85)
+        img_str = b64.b64encode(buffered.getvalue()).decode('ascii')
+        
+        return f"data:image/jpeg;base64,{img_str}"
+    
+    @staticmethod
+    def _process_epub_sync(file_path: Path) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Blocking part of process_epub (ZIP/XML parsing, cover decode and resize).
+        
+        Only container.xml, the OPF package document and the cover image are
+        read; chapters are never parsed.
+        """
+        # Probe the ZIP central directory first so malformed uploads bail out
+        # before any parsing
+        if not zipfile.is_zipfile(file_path):
+            logger.warning("Error reading EPUB: not a ZIP archive: %s", file_path)
+            return dict(DEFAULT_METADATA), None
+        
+        try:
+            archive = zipfile.ZipFile(file_path)
+        except Exception as e:
+            logger.warning("Error reading EPUB: %s", e)
+            return dict(DEFAULT_METADATA), None
+        
+        with archive:
+            if "META-INF/container.xml" not in archive.namelist():
+                logger.warning("Error reading EPUB: missing META-INF/container.xml: %s", file_path)
+                return dict(DEFAULT_METADATA), None
+            
+            try:
+                opf, opf_dir = EpubService._read_package(archive)
+            except Exception as e:
+                logger.warning("Error reading EPUB package: %s", e)
+                return dict(DEFAULT_METADATA), None
+            
+            metadata = EpubService._metadata_from_opf(opf)
+            
+            try:
+                cover_image = EpubService._find_cover_image(archive, opf, opf_dir)
+                cover = EpubService._cover_data_url(cover_image) if cover_image else None
+            except Exception as e:
+                logger.warning("Error extracting cover: %s", e)
+                cover = None
+        
+        return metadata, cover
     
     @staticmethod
-    async def get_epub_file(file_path: str) -> bytes:
-        """Read EPUB file from storage."""
-        path = Path(file_path)
-        if not path.exists():
-            raise FileNotFoundError(f"EPUB file not found: {file_path}")
-        
-        with open(path, "rb") as f:
-            return f.read()
+    async def process_epub(file_path: Path) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Parse an EPUB once and extract both its metadata and cover.
+        
+        Returns the metadata dict and the cover as a data URI (or None).
+        The work runs in a worker thread so other requests aren't blocked.
+        """
+        return await asyncio.to_thread(EpubService._process_epub_sync, file_path)
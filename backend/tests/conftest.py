@@ -0,0 +1,100 @@
+"""Shared fixtures: the desktop-mode app on a throwaway data directory."""
+import os
+import tempfile
+import zipfile
+from io import BytesIO
+
+# Settings and the engine are created at import time, so point the desktop
+# data directory somewhere disposable before the app is imported
+os.environ["HOME"] = tempfile.mkdtemp(prefix="vibereader-tests-")
+os.environ["VIBEREADER_DESKTOP"] = "true"
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.models.base import Base
+from app.routers.settings import invalidate_settings_cache
+
+CONTAINER_XML = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>"""
+
+CONTENT_OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="id">{title}</dc:identifier>
+    <dc:title>{title}</dc:title>
+    <dc:creator>{author}</dc:creator>
+    <dc:language>en</dc:language>
+  </metadata>
+  <manifest>
+    <item id="cover" href="cover.png" media-type="image/png" properties="cover-image"/>
+    <item id="c1" href="c1.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="c1"/></spine>
+</package>"""
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def books_dir():
+    return get_settings().books_dir
+
+
+@pytest.fixture(autouse=True)
+def clean_library(client, books_dir):
+    """Empty the database and book storage after each test."""
+    yield
+    
+    async def wipe():
+        async with AsyncSessionLocal() as db:
+            for table in reversed(Base.metadata.sorted_tables):
+                await db.execute(table.delete())
+            await db.commit()
+    
+    client.portal.call(wipe)
+    invalidate_settings_cache()
+    for path in books_dir.iterdir():
+        path.unlink()
+
+
+@pytest.fixture
+def make_epub():
+    """Build a minimal EPUB (container, OPF, one chapter and a PNG cover)."""
+    def make(title: str, author: str = "Test Author") -> bytes:
+        cover = BytesIO()
+        Image.new("RGB", (60, 90), "red").save(cover, format="PNG")
+        
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr("mimetype", "application/epub+zip")
+            archive.writestr("META-INF/container.xml", CONTAINER_XML)
+            archive.writestr("OEBPS/content.opf", CONTENT_OPF.format(title=title, author=author))
+            archive.writestr("OEBPS/c1.xhtml", "<html><body><p>Hello</p></body></html>")
+            archive.writestr("OEBPS/cover.png", cover.getvalue())
+        return buf.getvalue()
+    
+    return make
+
+
+@pytest.fixture
+def book(client, make_epub):
+    """A book imported through the API."""
+    response = client.post(
+        "/api/books/import",
+        files={"file": ("book.epub", make_epub("Fixture Book"), "application/epub+zip")},
+    )
+    assert response.status_code == 200
+    return response.json()
@@ -0,0 +1,75 @@
+"""Tests for the highlight, note and chat context endpoints."""
+import pytest
+
+# Per annotation type: the path id name published in the API schema and the
+# PATCH body with the field it changes
+ID_PARAMS = {"highlights": "highlight_id", "notes": "note_id", "chat-contexts": "chat_id"}
+UPDATES = {
+    "highlights": {"color": "purple"},
+    "notes": {"note_content": "Edited note"},
+    "chat-contexts": {"ai_response": "Because."},
+}
+NEW_ITEMS = {
+    "highlights": {"cfi_range": "epubcfi(/6/4!/4/2)", "text": "Selected", "color": "green"},
+    "notes": {"cfi_range": "epubcfi(/6/4!/4/2)", "text": "Selected", "note_content": "A note"},
+    "chat-contexts": {"cfi_range": "epubcfi(/6/4!/4/2)", "text": "Selected", "user_prompt": "Why?"},
+}
+
+
+@pytest.mark.parametrize("kind", NEW_ITEMS)
+def test_create_for_missing_book_is_404(client, kind):
+    item = {"book_id": 999999, **NEW_ITEMS[kind]}
+    
+    single = client.post(f"/api/annotations/{kind}", json=item)
+    bulk = client.post(f"/api/annotations/{kind}/bulk", json={"items": [item]})
+    
+    assert single.status_code == 404
+    assert bulk.status_code == 404
+    assert single.json()["detail"] == "Book not found"
+
+
+@pytest.mark.parametrize("kind", NEW_ITEMS)
+def test_crud_round_trip(client, book, kind):
+    base = f"/api/annotations/{kind}"
+    
+    created = client.post(base, json={"book_id": book["id"], **NEW_ITEMS[kind]})
+    assert created.status_code == 200
+    item = created.json()
+    assert item["id"] and item["created_at"] and item["book_id"] == book["id"]
+    
+    listed = client.get(f"{base}/book/{book['id']}").json()
+    assert [i["id"] for i in listed] == [item["id"]]
+    
+    updated = client.patch(f"{base}/{item['id']}", json=UPDATES[kind])
+    assert updated.status_code == 200
+    assert updated.json().items() >= UPDATES[kind].items()
+    assert client.get(f"{base}/book/{book['id']}").json()[0].items() >= UPDATES[kind].items()
+    
+    assert client.delete(f"{base}/{item['id']}").status_code == 200
+    assert client.get(f"{base}/book/{book['id']}").json() == []
+    assert client.delete(f"{base}/{item['id']}").status_code == 404
+    assert client.patch(f"{base}/{item['id']}", json=UPDATES[kind]).status_code == 404
+
+
+@pytest.mark.parametrize("kind", NEW_ITEMS)
+def test_bulk_create_keeps_order(client, book, kind):
+    items = [
+        {"book_id": book["id"], **NEW_ITEMS[kind], "cfi_range": f"epubcfi(/6/{n})"}
+        for n in range(3)
+    ]
+    
+    response = client.post(f"/api/annotations/{kind}/bulk", json={"items": items})
+    
+    assert response.status_code == 200
+    assert [i["cfi_range"] for i in response.json()] == [i["cfi_range"] for i in items]
+    assert len(client.get(f"/api/annotations/{kind}/book/{book['id']}").json()) == 3
+
+
+@pytest.mark.parametrize("kind", NEW_ITEMS)
+def test_item_path_parameter_names_are_stable(client, kind):
+    paths = client.app.openapi()["paths"]
+    id_param = ID_PARAMS[kind]
+    
+    item_path = paths[f"/api/annotations/{kind}/{{{id_param}}}"]
+    for operation in item_path.values():
+        assert [p["name"] for p in operation["parameters"]] == [id_param]
@@ -0,0 +1,80 @@
+"""Tests for the single-book endpoints."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.database import engine
+
+
+def test_epub_download_is_not_compressed(client, book):
+    response = client.get(f"/api/books/{book['id']}/file", headers={"Accept-Encoding": "gzip"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/epub+zip"
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == f'"{book["file_hash"]}"'
+
+
+def test_book_list_is_compressed(client, make_epub):
+    for i in range(3):
+        data = make_epub(f"Book {i}")
+        client.post("/api/books/import", files={"file": (f"{i}.epub", data, "application/epub+zip")})
+    
+    response = client.get("/api/books", headers={"Accept-Encoding": "gzip"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 3
+
+
+def test_progress_update_changes_fields_and_last_read_date(client, book):
+    response = client.patch(
+        f"/api/books/{book['id']}/progress",
+        json={"current_cfi": "epubcfi(/6/2)", "percentage": 12.5},
+    )
+    
+    assert response.status_code == 200
+    updated = response.json()
+    assert updated["current_cfi"] == "epubcfi(/6/2)"
+    assert updated["percentage"] == 12.5
+    assert updated["last_read_date"]
+
+
+def test_duplicate_progress_update_does_not_write(client, book):
+    url = f"/api/books/{book['id']}/progress"
+    first = client.patch(url, json={"percentage": 40, "current_chapter": 3}).json()
+    
+    commits = []
+    
+    def count_commit(conn):
+        commits.append(conn)
+    
+    event.listen(engine.sync_engine, "commit", count_commit)
+    try:
+        repeat = client.patch(url, json={"percentage": 40})
+    finally:
+        event.remove(engine.sync_engine, "commit", count_commit)
+    
+    assert repeat.status_code == 200
+    assert repeat.json() == first
+    assert commits == []
+
+
+def test_progress_update_for_missing_book_is_404(client):
+    assert client.patch("/api/books/999999/progress", json={"percentage": 1}).status_code == 404
+    assert client.patch("/api/books/999999/progress", json={}).status_code == 404
+
+
+def test_progress_out_of_range_is_rejected(client, book):
+    response = client.patch(f"/api/books/{book['id']}/progress", json={"percentage": 101})
+    assert response.status_code == 422
+
+
+def test_timestamps_are_utc_with_subsecond_precision(client, book):
+    before = datetime.utcnow() - timedelta(seconds=5)
+    
+    updated = client.patch(f"/api/books/{book['id']}/progress", json={"percentage": 5}).json()
+    
+    for field in ("import_date", "created_at", "last_read_date", "updated_at"):
+        stamp = datetime.fromisoformat(updated[field])
+        assert before <= stamp <= datetime.utcnow() + timedelta(seconds=5), field
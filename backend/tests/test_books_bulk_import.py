@@ -0,0 +1,90 @@
+"""Tests for POST /api/books/import-bulk."""
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import Book
+from app.routers import books
+
+
+def epub_file(name, data):
+    return ("files", (name, data, "application/epub+zip"))
+
+
+def test_bulk_import_skips_non_epubs_and_duplicates(client, make_epub, books_dir, book):
+    in_library = client.get(f"/api/books/{book['id']}/file").content
+    second = make_epub("Second Book")
+    third = make_epub("Third Book")
+    
+    response = client.post("/api/books/import-bulk", files=[
+        epub_file("second.epub", second),
+        epub_file("again.epub", in_library),
+        epub_file("third.epub", third),
+        epub_file("third-copy.epub", third),
+        ("files", ("notes.txt", b"not a book", "text/plain")),
+    ])
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert [b["title"] for b in body["imported"]] == ["Second Book", "Third Book"]
+    assert sorted(body["skipped"]) == ["again.epub", "notes.txt", "third-copy.epub"]
+    assert all(b["id"] and b["cover_image"] for b in body["imported"])
+    assert len(client.get("/api/books").json()) == 3
+    # One stored file per book and no leftover temp files
+    assert len(list(books_dir.iterdir())) == 3
+
+
+def test_bulk_import_reports_failed_uploads(client, make_epub, books_dir, monkeypatch):
+    save_upload = books.epub_service.save_upload
+    
+    async def flaky_save_upload(file):
+        if file.filename == "broken.epub":
+            raise OSError("disk full")
+        return await save_upload(file)
+    
+    monkeypatch.setattr(books.epub_service, "save_upload", flaky_save_upload)
+    response = client.post("/api/books/import-bulk", files=[
+        epub_file("good.epub", make_epub("Good Book")),
+        epub_file("broken.epub", make_epub("Broken Book")),
+    ])
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert [b["title"] for b in body["imported"]] == ["Good Book"]
+    assert body["skipped"] == ["broken.epub"]
+    assert len(list(books_dir.iterdir())) == 1
+
+
+def test_bulk_import_rollback_removes_stored_files(client, make_epub, books_dir, monkeypatch):
+    async def failing_bulk_create(session, rows):
+        raise RuntimeError("insert failed")
+    
+    monkeypatch.setattr(Book, "bulk_create", failing_bulk_create)
+    response = client.post("/api/books/import-bulk", files=[
+        epub_file("one.epub", make_epub("One")),
+        epub_file("two.epub", make_epub("Two")),
+    ])
+    
+    assert response.status_code == 500
+    assert client.get("/api/books").json() == []
+    assert list(books_dir.iterdir()) == []
+
+
+def test_bulk_import_rollback_keeps_files_of_committed_books(client, make_epub, books_dir, monkeypatch):
+    async def racing_bulk_create(session, rows):
+        # A concurrent import commits the first book before this insert fails
+        async with AsyncSessionLocal() as other:
+            other.add(Book(**rows[0]))
+            await other.commit()
+        raise RuntimeError("insert failed")
+    
+    monkeypatch.setattr(Book, "bulk_create", racing_bulk_create)
+    response = client.post("/api/books/import-bulk", files=[
+        epub_file("one.epub", make_epub("One")),
+        epub_file("two.epub", make_epub("Two")),
+    ])
+    
+    assert response.status_code == 500
+    [committed] = client.get("/api/books").json()
+    assert committed["title"] == "One"
+    assert [path.name for path in books_dir.iterdir()] == [f"{committed['file_hash']}.epub"]
+    assert client.get(f"/api/books/{committed['id']}/file").status_code == 200
@@ -0,0 +1,101 @@
+"""Tests for the settings endpoints and their in-memory cache."""
+import asyncio
+
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models import UserSettings
+from app.routers import settings as settings_router
+
+
+def test_get_settings_creates_defaults_once(client):
+    first = client.get("/api/settings").json()
+    second = client.get("/api/settings").json()
+    
+    assert first == second
+    assert first["font_size"] and first["theme"]
+
+
+def test_cached_get_does_not_open_a_session(client, monkeypatch):
+    expected = client.get("/api/settings").json()
+    
+    def no_session():
+        raise AssertionError("cache hit opened a database session")
+    
+    monkeypatch.setattr(settings_router, "AsyncSessionLocal", no_session)
+    assert client.get("/api/settings").json() == expected
+
+
+def test_patch_updates_next_get(client):
+    client.get("/api/settings")
+    
+    reading = client.patch("/api/settings/reading", json={"font_size": 21, "theme": "dark"})
+    assert reading.status_code == 200
+    api = client.patch("/api/settings/api", json={"api_model_name": "some-model"})
+    assert api.status_code == 200
+    
+    current = client.get("/api/settings").json()
+    assert current["font_size"] == 21
+    assert current["theme"] == "dark"
+    assert current["api_model_name"] == "some-model"
+
+
+def test_invalidate_settings_cache_reloads_from_database(client):
+    client.get("/api/settings")
+    
+    async def change_font_size():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(UserSettings).values(font_size=30))
+            await db.commit()
+    
+    # Written behind the API's back, so the cached row is stale
+    client.portal.call(change_font_size)
+    assert client.get("/api/settings").json()["font_size"] != 30
+    
+    settings_router.invalidate_settings_cache()
+    assert client.get("/api/settings").json()["font_size"] == 30
+
+
+def test_patch_during_cold_read_is_not_overwritten(client, monkeypatch):
+    client.patch("/api/settings/reading", json={"font_size": 16})
+    settings_router.invalidate_settings_cache()
+    
+    async def scenario():
+        selected = asyncio.Event()
+        resume = asyncio.Event()
+        
+        class PausingSession:
+            """Session whose first query pauses the cold read after its SELECT."""
+            
+            def __init__(self):
+                self.session = AsyncSessionLocal()
+            
+            async def __aenter__(self):
+                await self.session.__aenter__()
+                return self
+            
+            async def __aexit__(self, *exc):
+                return await self.session.__aexit__(*exc)
+            
+            async def execute(self, *args, **kwargs):
+                result = await self.session.execute(*args, **kwargs)
+                selected.set()
+                await resume.wait()
+                return result
+        
+        monkeypatch.setattr(settings_router, "AsyncSessionLocal", PausingSession)
+        cold_read = asyncio.create_task(settings_router.get_settings())
+        await selected.wait()
+        
+        async with AsyncSessionLocal() as db:
+            patch = asyncio.create_task(settings_router.update_reading_settings(
+                settings_router.ReadingSettingsUpdate(font_size=25), db=db
+            ))
+            # Without the lock the PATCH would finish while the read is paused
+            await asyncio.sleep(0.05)
+            resume.set()
+            await asyncio.gather(cold_read, patch)
+    
+    client.portal.call(scenario)
+    
+    assert client.get("/api/settings").json()["font_size"] == 25
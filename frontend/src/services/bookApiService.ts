@@ -22,6 +22,8 @@ export interface Book {
   import_date: string;
   created_at: string;
   updated_at: string;
+  highlight_count?: number;
+  note_count?: number;
 }
 
 export interface ProgressUpdate {